@@ -0,0 +1,462 @@
+#!/usr/bin/env python
+"""Batch analysis of captured RedstoneBench WebSocket message logs.
+
+Each log is a JSON-lines dump of the messages RedstoneBenchController
+receives (status_response_all, job_start, job_complete, job_failed,
+command_response). Messages are expected to carry an epoch-millisecond
+"timestamp" as in the WebSocket API spec; captures that stamp lines on
+receipt may use "received_at" (epoch seconds) instead. Either field may
+also be a numeric string or an ISO 8601 string.
+
+Usage:
+    python redstonebench_analyze.py logs/ session_*.jsonl.gz -j 8
+    python redstonebench_analyze.py logs/ --json > summary.json
+"""
+import argparse
+import gzip
+import json
+import math
+import os
+import sys
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional, Tuple
+
+JOB_END_TYPES = ("job_complete", "job_failed")
+LOG_SUFFIXES = (".jsonl", ".jsonl.gz", ".ndjson", ".ndjson.gz")
+# Truncated or corrupt captures (e.g. a recorder killed mid-write) surface as
+# one of these; they mark that session as errored instead of failing the batch.
+LOG_READ_ERRORS = (OSError, EOFError, ValueError, zlib.error)
+
+# --- LATENCY HISTOGRAM ---
+# Job latencies are bucketed on a log scale so a session summary has a fixed
+# size no matter how many jobs it contains, and summaries merge by addition.
+
+HISTOGRAM_BASE_MS = 1.0
+HISTOGRAM_GROWTH = 1.05  # ~5% relative error on reported percentiles
+
+
+@dataclass
+class LatencyHistogram:
+    counts: Dict[int, int] = field(default_factory=dict)
+    total: int = 0
+    sum_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def add(self, latency_ms: float):
+        bucket = 0
+        if latency_ms > HISTOGRAM_BASE_MS:
+            bucket = int(math.ceil(math.log(latency_ms / HISTOGRAM_BASE_MS, HISTOGRAM_GROWTH)))
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        self.sum_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def merge(self, other: "LatencyHistogram"):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total += other.total
+        self.sum_ms += other.sum_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def mean(self) -> float:
+        return self.sum_ms / self.total if self.total else 0.0
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the pct-th latency, capped at the observed max."""
+        if not self.total:
+            return 0.0
+        rank = max(1, int(math.ceil(self.total * pct / 100.0)))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(HISTOGRAM_BASE_MS * HISTOGRAM_GROWTH ** bucket, self.max_ms)
+        return self.max_ms
+
+# --- SESSION ANALYSIS (runs inside pool workers) ---
+
+@dataclass
+class BotStats:
+    busy_ms: float = 0.0
+    jobs_completed: int = 0
+    jobs_failed: int = 0
+    idle_gaps: int = 0
+    idle_ms: float = 0.0
+    max_idle_gap_ms: float = 0.0
+
+
+@dataclass
+class SessionSummary:
+    path: str
+    messages: int = 0
+    malformed_lines: int = 0
+    untimed_messages: int = 0
+    untimed_job_events: int = 0
+    unmatched_job_ends: int = 0  # end events with no open job (capture began mid-job, stale ends)
+    duration_ms: float = 0.0
+    bots: Dict[str, BotStats] = field(default_factory=dict)
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    commands_accepted: int = 0
+    commands_rejected: int = 0
+    error: Optional[str] = None
+    # Available bot-time; set when merging, where it is not duration * bot count.
+    capacity_ms: Optional[float] = None
+
+    @property
+    def busy_ms(self) -> float:
+        return sum(bot.busy_ms for bot in self.bots.values())
+
+    @property
+    def efficiency(self) -> float:
+        """Fraction of available bot-time spent on jobs (1.0 = every bot busy all session)."""
+        capacity = self.capacity_ms if self.capacity_ms is not None else self.duration_ms * len(self.bots)
+        return self.busy_ms / capacity if capacity else 0.0
+
+
+def bot_key(bot_id) -> str:
+    """Normalize 0, "0" and "worker_0" to the TUI's "worker_0" form."""
+    bot_id = str(bot_id)
+    return bot_id if bot_id.startswith("worker_") else f"worker_{bot_id}"
+
+
+def parse_time_ms(value, unit_ms: float) -> Optional[float]:
+    """Convert a numeric (in units of unit_ms), numeric-string or ISO 8601 time to epoch ms.
+
+    ISO times without an offset are taken as UTC so results do not depend on
+    the analyzing machine's timezone.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) * unit_ms
+    if isinstance(value, str):
+        try:
+            return float(value) * unit_ms
+        except ValueError:
+            pass
+        try:
+            moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment.timestamp() * 1000.0
+    return None
+
+
+def message_time_ms(data: Dict) -> Optional[float]:
+    for name, unit_ms in (("timestamp", 1.0), ("received_at", 1000.0)):
+        if name in data:
+            now = parse_time_ms(data[name], unit_ms)
+            if now is not None and math.isfinite(now):
+                return now
+    return None
+
+
+def open_log(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def iter_messages(path: str, summary: SessionSummary) -> Iterator[Dict]:
+    """Yield decoded messages one line at a time, counting lines that fail to parse."""
+    with open_log(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except (ValueError, RecursionError):
+                summary.malformed_lines += 1
+                continue
+            if isinstance(data, dict):
+                yield data
+            else:
+                summary.malformed_lines += 1
+
+
+def analyze_session(path: str) -> SessionSummary:
+    """Stream one log and reduce it to a fixed-size SessionSummary.
+
+    A bot runs one job at a time (the server rejects commands with BOT_BUSY),
+    so only the open job and last job end per bot are held in memory and a
+    worker's footprint does not grow with log length.
+    """
+    summary = SessionSummary(path=path)
+    first_ms: Optional[float] = None
+    last_ms: Optional[float] = None
+    # bot -> (job_id, start_ms); job_id is None when the server omits it
+    open_jobs: Dict[str, Tuple[Optional[str], float]] = {}
+    last_job_end: Dict[str, float] = {}
+
+    def bot(key: str) -> BotStats:
+        if key not in summary.bots:
+            summary.bots[key] = BotStats()
+        return summary.bots[key]
+
+    def close_job(key: str, start_ms: float, end_ms: float, failed: bool):
+        stats = bot(key)
+        latency = max(0.0, end_ms - start_ms)
+        stats.busy_ms += latency
+        if failed:
+            stats.jobs_failed += 1
+        else:
+            stats.jobs_completed += 1
+        summary.latency.add(latency)
+        last_job_end[key] = max(last_job_end.get(key, end_ms), end_ms)
+
+    try:
+        for data in iter_messages(path, summary):
+            summary.messages += 1
+            msg_type = data.get("type")
+            now = message_time_ms(data)
+            if now is not None:
+                first_ms = now if first_ms is None else min(first_ms, now)
+                last_ms = now if last_ms is None else max(last_ms, now)
+            else:
+                summary.untimed_messages += 1
+                if msg_type == "job_start" or msg_type in JOB_END_TYPES:
+                    summary.untimed_job_events += 1
+
+            if msg_type == "status_response_all":
+                bots = data.get("bots")
+                if isinstance(bots, dict):
+                    for bot_id in bots:
+                        bot(bot_key(bot_id))
+
+            elif msg_type == "job_start" and now is not None and "bot_id" in data:
+                key = bot_key(data["bot_id"])
+                stats = bot(key)
+                if key in open_jobs:
+                    # A new start without an end event: treat the old run as abandoned.
+                    close_job(key, open_jobs.pop(key)[1], now, failed=True)
+                elif key in last_job_end:
+                    gap = max(0.0, now - last_job_end[key])
+                    stats.idle_gaps += 1
+                    stats.idle_ms += gap
+                    stats.max_idle_gap_ms = max(stats.max_idle_gap_ms, gap)
+                open_jobs[key] = (data.get("job_id"), now)
+
+            elif msg_type in JOB_END_TYPES and now is not None and "bot_id" in data:
+                key = bot_key(data["bot_id"])
+                job_id = data.get("job_id")
+                open_id = open_jobs[key][0] if key in open_jobs else None
+                # Ends for a different job_id belong to a run already closed as abandoned.
+                if key in open_jobs and (job_id is None or open_id is None or job_id == open_id):
+                    close_job(key, open_jobs.pop(key)[1], now, failed=msg_type == "job_failed")
+                else:
+                    summary.unmatched_job_ends += 1
+
+            elif msg_type == "command_response":
+                if data.get("status") in ("accepted", "success"):
+                    summary.commands_accepted += 1
+                else:
+                    summary.commands_rejected += 1
+    except LOG_READ_ERRORS as e:
+        summary.error = f"{type(e).__name__}: {e}"
+        return summary
+
+    # Jobs still running when the capture stopped count as busy up to the end.
+    if last_ms is not None:
+        for key, (_, start_ms) in open_jobs.items():
+            bot(key).busy_ms += max(0.0, last_ms - start_ms)
+        summary.duration_ms = last_ms - first_ms
+    # Zeros would look like a valid idle session, so flag captures whose jobs
+    # could not be timed at all.
+    if summary.untimed_job_events and not (summary.latency.total or open_jobs):
+        summary.error = f"no usable timestamp on {summary.untimed_job_events} job events"
+    return summary
+
+# --- MERGING AND REPORTING ---
+
+def merge_summaries(summaries: List[SessionSummary]) -> SessionSummary:
+    """Combine sessions into one row; duration is the summed session time."""
+    total = SessionSummary(path="TOTAL")
+    for s in summaries:
+        total.messages += s.messages
+        total.malformed_lines += s.malformed_lines
+        total.untimed_messages += s.untimed_messages
+        total.untimed_job_events += s.untimed_job_events
+        total.unmatched_job_ends += s.unmatched_job_ends
+        total.commands_accepted += s.commands_accepted
+        total.commands_rejected += s.commands_rejected
+        total.latency.merge(s.latency)
+        for key, stats in s.bots.items():
+            total.bots[f"{s.path}:{key}"] = stats
+    total.duration_ms = sum(s.duration_ms for s in summaries)
+    total.capacity_ms = sum(s.duration_ms * len(s.bots) for s in summaries)
+    return total
+
+
+def bot_row(stats: BotStats) -> Dict:
+    return {
+        "busy_s": stats.busy_ms / 1000.0,
+        "jobs": stats.jobs_completed,
+        "failed": stats.jobs_failed,
+        "idle_gaps": stats.idle_gaps,
+        "idle_s": stats.idle_ms / 1000.0,
+        "max_idle_gap_s": stats.max_idle_gap_ms / 1000.0,
+    }
+
+
+def summary_row(s: SessionSummary, per_bot: bool = True) -> Dict:
+    bots = s.bots.values()
+    row = {
+        "session": s.path,
+        "bot_count": len(s.bots),
+        "duration_s": s.duration_ms / 1000.0,
+        "busy_s": s.busy_ms / 1000.0,
+        "efficiency": s.efficiency,
+        "jobs": sum(b.jobs_completed for b in bots),
+        "failed": sum(b.jobs_failed for b in bots),
+        "latency_mean_s": s.latency.mean() / 1000.0,
+        "latency_p50_s": s.latency.percentile(50) / 1000.0,
+        "latency_p90_s": s.latency.percentile(90) / 1000.0,
+        "latency_p99_s": s.latency.percentile(99) / 1000.0,
+        "latency_max_s": s.latency.max_ms / 1000.0,
+        "idle_gaps": sum(b.idle_gaps for b in bots),
+        "idle_s": sum(b.idle_ms for b in bots) / 1000.0,
+        "max_idle_gap_s": max((b.max_idle_gap_ms for b in bots), default=0.0) / 1000.0,
+        "commands_accepted": s.commands_accepted,
+        "commands_rejected": s.commands_rejected,
+        "malformed_lines": s.malformed_lines,
+        "untimed_messages": s.untimed_messages,
+        "untimed_job_events": s.untimed_job_events,
+        "unmatched_job_ends": s.unmatched_job_ends,
+        "error": s.error,
+    }
+    if per_bot:
+        row["bots"] = {key: bot_row(stats) for key, stats in sorted(s.bots.items())}
+    return row
+
+
+TABLE_COLUMNS: List[Tuple[str, str, str]] = [
+    # (row key, header, format)
+    ("bot_count", "Bots", "{:>4d}"),
+    ("duration_s", "Dur(s)", "{:>9.1f}"),
+    ("busy_s", "Busy(s)", "{:>9.1f}"),
+    ("efficiency", "Eff", "{:>6.1%}"),
+    ("jobs", "Jobs", "{:>6d}"),
+    ("failed", "Fail", "{:>5d}"),
+    ("latency_p50_s", "p50(s)", "{:>7.2f}"),
+    ("latency_p90_s", "p90(s)", "{:>7.2f}"),
+    ("latency_max_s", "max(s)", "{:>7.2f}"),
+    ("idle_gaps", "Gaps", "{:>5d}"),
+    ("idle_s", "Idle(s)", "{:>8.1f}"),
+    ("max_idle_gap_s", "MaxGap(s)", "{:>9.1f}"),
+]
+
+
+def session_labels(paths: List[str]) -> Dict[str, str]:
+    """Label logs by their path below the directory they all share."""
+    try:
+        common = os.path.commonpath([os.path.dirname(path) for path in paths])
+    except ValueError:  # mix of absolute and relative paths, or different drives
+        return {path: path for path in paths}
+    return {path: os.path.relpath(path, common) for path in paths}
+
+
+def format_table(rows: List[Dict]) -> str:
+    # The last row is the TOTAL when there is more than one.
+    session_rows = rows[:-1] if len(rows) > 1 else rows
+    labels = session_labels([row["session"] for row in session_rows])
+    names = [labels.get(row["session"], row["session"]) for row in rows]
+    name_width = max(len("Session"), *(len(name) for name in names))
+    header = f"{'Session':<{name_width}}"
+    for _, title, fmt in TABLE_COLUMNS:
+        width = len(fmt.format(0))
+        header += f"  {title:>{width}}"
+    lines = [header, "-" * len(header)]
+    for row, name in zip(rows, names):
+        if row is rows[-1] and len(rows) > 1:
+            lines.append("-" * len(header))
+        line = f"{name:<{name_width}}"
+        if row["error"]:
+            line += f"  error: {row['error']}"
+        else:
+            line += "".join("  " + fmt.format(row[key]) for key, _, fmt in TABLE_COLUMNS)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def collect_logs(paths: List[str]) -> List[str]:
+    """Expand directories into the message logs they contain, each file once."""
+    logs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                logs.extend(os.path.join(root, name) for name in files if name.endswith(LOG_SUFFIXES))
+        else:
+            logs.append(path)
+    return sorted(set(os.path.realpath(log) for log in logs))
+
+
+def log_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0  # reported as a session error by analyze_session
+
+
+def analyze_logs(logs: List[str], jobs: Optional[int] = None) -> List[SessionSummary]:
+    """Analyze logs across a process pool; each worker handles one file at a time.
+
+    Logs are submitted largest first so a few big captures don't leave the
+    other workers idle at the end of the batch.
+    """
+    if not logs:
+        return []
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(logs)))
+    if jobs == 1:
+        return [analyze_session(path) for path in logs]
+    with Pool(processes=jobs) as pool:
+        largest_first = sorted(logs, key=log_size, reverse=True)
+        summaries = list(pool.imap_unordered(analyze_session, largest_first, chunksize=1))
+    return sorted(summaries, key=lambda s: s.path)
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize captured RedstoneBench WebSocket message logs.")
+    parser.add_argument("paths", nargs="+", help="JSON-lines log files or directories containing them")
+    parser.add_argument("-j", "--jobs", type=positive_int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="emit per-session rows and the total as JSON")
+    args = parser.parse_args(argv)
+
+    logs = collect_logs(args.paths)
+    if not logs:
+        print("No message logs found.", file=sys.stderr)
+        return 1
+
+    summaries = analyze_logs(logs, args.jobs)
+    for s in summaries:
+        if s.untimed_job_events and s.error is None:
+            print(f"warning: {s.path}: {s.untimed_job_events} job events without a usable timestamp were skipped",
+                  file=sys.stderr)
+    rows = [summary_row(s) for s in summaries]
+    # The TOTAL row's bots are every session's bots; the per-session rows already list them.
+    rows.append(summary_row(merge_summaries([s for s in summaries if s.error is None]), per_bot=False))
+
+    if args.json:
+        json.dump({"sessions": rows[:-1], "total": rows[-1]}, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_table(rows))
+    return 1 if any(s.error for s in summaries) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+import gzip
+import json
+import time
+
+import pytest
+
+import redstonebench_analyze as analyze
+
+
+def write_log(path, messages):
+    with open(path, "w") as f:
+        for message in messages:
+            f.write(json.dumps(message) + "\n")
+    return str(path)
+
+
+def status_all(ts, bot_ids=(0, 1)):
+    return {"type": "status_response_all", "timestamp": ts, "bots": {str(i): {} for i in bot_ids}}
+
+
+def event(msg_type, bot_id, ts, **extra):
+    return dict(type=msg_type, bot_id=bot_id, timestamp=ts, **extra)
+
+
+@pytest.fixture
+def session_log(tmp_path):
+    # worker_0: job 0-1000ms, idle 1000ms, job 2000-5000ms (failed)
+    # worker_1: job 500-2500ms, then a job left open until capture end at 10000ms
+    return write_log(tmp_path / "session.jsonl", [
+        status_all(0),
+        event("job_start", 0, 0, job_id="a"),
+        {"type": "command_response", "status": "accepted", "bot_id": 0},
+        event("job_start", 1, 500, job_id="b"),
+        event("job_complete", 0, 1000, job_id="a"),
+        event("job_start", 0, 2000, job_id="c"),
+        event("job_complete", 1, 2500, job_id="b"),
+        event("job_failed", 0, 5000, job_id="c"),
+        event("job_start", 1, 8000, job_id="d"),
+        {"type": "command_response", "status": "rejected", "bot_id": 1},
+        status_all(10000),
+    ])
+
+
+def test_busy_time_gaps_and_efficiency(session_log):
+    s = analyze.analyze_session(session_log)
+    assert s.error is None
+    assert s.duration_ms == 10000
+    w0, w1 = s.bots["worker_0"], s.bots["worker_1"]
+    assert (w0.busy_ms, w0.jobs_completed, w0.jobs_failed) == (4000, 1, 1)
+    assert (w0.idle_gaps, w0.idle_ms, w0.max_idle_gap_ms) == (1, 1000, 1000)
+    # Open job counts as busy until the last message.
+    assert (w1.busy_ms, w1.jobs_completed) == (4000, 1)
+    assert (w1.idle_gaps, w1.max_idle_gap_ms) == (1, 5500)
+    assert s.efficiency == pytest.approx(8000 / 20000)
+    assert (s.commands_accepted, s.commands_rejected) == (1, 1)
+
+
+def test_latency_distribution(session_log):
+    latency = analyze.analyze_session(session_log).latency
+    assert latency.total == 3
+    assert latency.mean() == pytest.approx(2000)
+    assert latency.max_ms == 3000
+    assert latency.percentile(50) == pytest.approx(2000, rel=0.05)
+    assert latency.percentile(100) == 3000
+
+
+def test_histogram_merge_matches_combined():
+    a, b, combined = analyze.LatencyHistogram(), analyze.LatencyHistogram(), analyze.LatencyHistogram()
+    for i, ms in enumerate(range(10, 5000, 37)):
+        (a if i % 2 else b).add(ms)
+        combined.add(ms)
+    a.merge(b)
+    assert a.counts == combined.counts
+    assert (a.total, a.max_ms) == (combined.total, combined.max_ms)
+    assert a.percentile(90) == combined.percentile(90)
+
+
+def test_end_events_without_job_id_match_open_job(tmp_path):
+    path = write_log(tmp_path / "s.jsonl", [
+        event("job_start", "worker_0", 0),
+        event("job_complete", "worker_0", 100),
+        event("job_start", "worker_0", 300, job_id="x"),
+        event("job_complete", "worker_0", 400),
+    ])
+    w0 = analyze.analyze_session(path).bots["worker_0"]
+    assert (w0.jobs_completed, w0.busy_ms, w0.idle_ms) == (2, 200, 200)
+
+
+def test_restart_closes_previous_job_as_abandoned(tmp_path):
+    path = write_log(tmp_path / "s.jsonl", [
+        event("job_start", 0, 0, job_id="a"),
+        event("job_start", 0, 100, job_id="b"),
+        event("job_complete", 0, 300),
+        event("job_complete", 0, 400, job_id="a"),  # stale end for the abandoned run
+    ])
+    s = analyze.analyze_session(path)
+    w0 = s.bots["worker_0"]
+    assert (w0.jobs_completed, w0.jobs_failed, w0.busy_ms) == (1, 1, 300)
+    assert w0.idle_gaps == 0
+    assert s.unmatched_job_ends == 1
+
+
+def test_end_without_open_job_is_counted(tmp_path):
+    path = write_log(tmp_path / "s.jsonl", [
+        event("job_complete", 0, 500, job_id="started_before_capture"),
+        event("job_start", 0, 1000),
+        event("job_complete", 0, 2000),
+    ])
+    s = analyze.analyze_session(path)
+    assert s.unmatched_job_ends == 1
+    assert s.bots["worker_0"].jobs_completed == 1
+    assert analyze.summary_row(s)["unmatched_job_ends"] == 1
+
+
+def test_string_timestamps(tmp_path, monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    if hasattr(time, "tzset"):
+        time.tzset()
+    path = write_log(tmp_path / "s.jsonl", [
+        {"type": "job_start", "bot_id": 0, "timestamp": "2024-01-01T00:00:00Z"},
+        {"type": "job_complete", "bot_id": 0, "timestamp": "1704067202000"},
+        {"type": "job_start", "bot_id": 0, "received_at": "1704067203.5"},
+        {"type": "job_complete", "bot_id": 0, "timestamp": "2024-01-01T00:00:04"},  # naive = UTC
+    ])
+    try:
+        s = analyze.analyze_session(path)
+    finally:
+        monkeypatch.undo()
+        if hasattr(time, "tzset"):
+            time.tzset()
+    assert s.bots["worker_0"].busy_ms == 2500
+    assert s.bots["worker_0"].idle_ms == 1500
+    assert s.untimed_messages == 0
+
+
+def test_untimed_jobs_mark_session_errored(tmp_path):
+    path = write_log(tmp_path / "s.jsonl", [
+        {"type": "job_start", "bot_id": 0},
+        {"type": "job_complete", "bot_id": 0},
+    ])
+    s = analyze.analyze_session(path)
+    assert s.untimed_job_events == 2
+    assert "timestamp" in s.error
+
+
+def test_malformed_lines_and_bad_bots_are_counted(tmp_path):
+    path = tmp_path / "s.jsonl"
+    with open(path, "wb") as f:
+        f.write(b'{"type": "status_response_all", "timestamp": 0, "bots": null}\n')
+        f.write(b'{"type": "status_response_all", "timestamp": 1, "bots": [{"bot_id": 0}]}\n')
+        f.write(b"\xff\xfe not json\n[1, 2]\n")
+        f.write(b"[" * 100000 + b"\n")
+    s = analyze.analyze_session(str(path))
+    assert s.error is None
+    assert s.malformed_lines == 3
+    assert s.bots == {}
+
+
+def test_merge_weights_efficiency_by_session_capacity(tmp_path, session_log):
+    short = write_log(tmp_path / "short.jsonl", [
+        status_all(0, bot_ids=(0,)),
+        event("job_start", 0, 0),
+        event("job_complete", 0, 1000),
+    ])
+    summaries = [analyze.analyze_session(session_log), analyze.analyze_session(short)]
+    total = analyze.merge_summaries(summaries)
+    # (8000 + 1000) busy over (2 bots * 10000 + 1 bot * 1000) capacity
+    assert total.efficiency == pytest.approx(9000 / 21000)
+    assert total.duration_ms == 11000
+    assert total.latency.total == 4
+    assert len(total.bots) == 3
+
+
+def test_corrupt_file_does_not_stop_batch(tmp_path, session_log, capsys):
+    good_gz = tmp_path / "good.jsonl.gz"
+    with open(session_log, "rb") as src, gzip.open(good_gz, "wb") as dst:
+        dst.write(src.read())
+    truncated = tmp_path / "truncated.jsonl.gz"
+    truncated.write_bytes(good_gz.read_bytes()[:-12])
+
+    summaries = analyze.analyze_logs(analyze.collect_logs([str(tmp_path)]), jobs=2)
+    by_name = {s.path.rsplit("/", 1)[-1]: s for s in summaries}
+    assert by_name["truncated.jsonl.gz"].error.startswith("EOFError")
+    assert by_name["good.jsonl.gz"].error is None
+    assert by_name["session.jsonl"].bots["worker_0"].busy_ms == 4000
+
+    assert analyze.main([str(tmp_path), "--json", "-j", "2"]) == 1
+    report = json.loads(capsys.readouterr().out)
+    assert len(report["sessions"]) == 3
+    assert report["sessions"][0]["bots"]["worker_0"]["busy_s"] == 4.0
+    assert (report["total"]["jobs"], report["total"]["failed"]) == (4, 2)
+
+
+def test_collect_logs_dedupes_overlapping_paths(tmp_path, session_log):
+    nested = tmp_path / "day1"
+    nested.mkdir()
+    inner = write_log(nested / "other.jsonl", [event("job_start", 0, 0), event("job_complete", 0, 1000)])
+
+    logs = analyze.collect_logs([str(tmp_path), inner, str(nested / ".." / "session.jsonl")])
+    assert len(logs) == 2
+    total = analyze.merge_summaries(analyze.analyze_logs(logs, jobs=1))
+    assert total.latency.total == 4
+
+
+def test_table_labels_distinguish_same_named_logs(tmp_path, session_log, capsys):
+    for day in ("day1", "day2"):
+        (tmp_path / day).mkdir()
+        write_log(tmp_path / day / "session.jsonl", [event("job_start", 0, 0), event("job_complete", 0, 1000)])
+
+    assert analyze.main([str(tmp_path), "-j", "1"]) == 0
+    labels = [line.split()[0] for line in capsys.readouterr().out.splitlines()[2:] if not line.startswith("-")]
+    assert labels == ["day1/session.jsonl", "day2/session.jsonl", "session.jsonl", "TOTAL"]
+
+
+@pytest.mark.parametrize("value", ["0", "-2"])
+def test_jobs_must_be_positive(value):
+    with pytest.raises(SystemExit):
+        analyze.main(["logs", "-j", value])